@@ -15,11 +15,21 @@
 # limitations under the License.
 #
 
-from typing import Optional, Callable, Dict, List
-import json
+from typing import Any, Optional, Callable, Dict, Iterator, List, Tuple
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import math
+import numbers
+import threading
+
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
 
 import daft
 from daft import DataFrame
+import pyarrow as pa
 import daft.context
 from daft.datatype import DataType
 import sqlalchemy
@@ -28,8 +38,84 @@ from sqlalchemy import Connection
 
 __all__ = ["SqlClient", "SqlClientError"]
 
+_runner_set = False
+
+
+def _set_runner_native() -> None:
+    global _runner_set
+    if not _runner_set:
+        daft.context.set_runner_native()
+        _runner_set = True
+
+
+def _bounded_queries(
+    sql: str, partition_col: str, num_partitions: int, lower: Any, upper: Any
+) -> List[str]:
+    if isinstance(lower, numbers.Integral) and isinstance(upper, numbers.Integral):
+        bounds = [
+            lower + (upper - lower) * i // num_partitions
+            for i in range(1, num_partitions)
+        ]
+    else:
+        bounds = [
+            lower + (upper - lower) * i / num_partitions
+            for i in range(1, num_partitions)
+        ]
+    predicates = (
+        [f"{partition_col} < {bounds[0]} OR {partition_col} IS NULL"]
+        + [
+            f"{partition_col} >= {lo} AND {partition_col} < {hi}"
+            for lo, hi in zip(bounds[:-1], bounds[1:])
+        ]
+        + [f"{partition_col} >= {bounds[-1]}"]
+    )
+    return [f"SELECT * FROM ({sql}) AS subquery WHERE {p}" for p in predicates]
+
+
+class _ConnectionFactory(object):
+    """
+    Picklable SQL alchemy connection factory that creates its engine once per process.
+    """
+
+    __slots__ = ("db_url", "kwargs", "_engine", "_lock")
+
+    def __init__(self, db_url: str, **kwargs):
+        self.db_url = db_url
+        self.kwargs = kwargs
+        self._engine = sqlalchemy.create_engine(db_url, **kwargs)
+        self._lock = threading.Lock()
+
+    def __call__(self) -> "Connection":
+        return self.engine.connect()
+
+    def __getstate__(self):
+        return self.db_url, self.kwargs
+
+    def __setstate__(self, state):
+        self.db_url, self.kwargs = state
+        self._engine = None
+        self._lock = threading.Lock()
+
+    @property
+    def engine(self) -> sqlalchemy.Engine:
+        if self._engine is None:
+            with self._lock:
+                if self._engine is None:
+                    self._engine = sqlalchemy.create_engine(
+                        self.db_url, **self.kwargs
+                    )
+        return self._engine
+
+    def dispose(self) -> None:
+        with self._lock:
+            if self._engine is not None:
+                self._engine.dispose()
+                self._engine = None
+
 
 class SqlClientError(Exception):
+    __slots__ = ("message",)
+
     def __init__(self, message=None):
         self.message = message
 
@@ -39,6 +125,18 @@ class SqlClient(object):
     Wrapper for daft package.
     """
 
+    __slots__ = (
+        "use_native_runner",
+        "conn",
+        "_queries_cache",
+        "_schema_cache",
+        "_partition_schema_cache",
+        "_bounds_cache",
+    )
+
+    QUERIES_CACHE_SIZE = 128
+    PARTITION_SCHEMA_CACHE_SIZE = 1024
+
     def __init__(
         self,
         db_url: str,
@@ -50,14 +148,52 @@ class SqlClient(object):
         Args:
             db_url (str): Database URL
             use_native_runner (bool, optional): Indicator whether to use the native runner of daft. Defaults to True.
+                Note the runner is a process-global setting of daft and it is set once per process,
+                including when the client is unpickled in a worker process.
             **kwargs: Arguments used to be added to SQL alchema engine connection.
         """
         self.use_native_runner = use_native_runner
-        self.conn = lambda: sqlalchemy.create_engine(db_url, **kwargs).connect()
+        self._set_runner()
+        self.conn = None
+        self._queries_cache = OrderedDict()
+        self._schema_cache = {}
+        self._partition_schema_cache = OrderedDict()
+        self._bounds_cache: Dict[Tuple[str, str], Tuple[Any, Any]] = {}
+        self.conn = self.set_conn(db_url, **kwargs)
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+        self._set_runner()
+
+    def _set_runner(self) -> None:
+        if self.use_native_runner:
+            try:
+                _set_runner_native()
+            except Exception as e:
+                raise SqlClientError(str(e))
+
+    def __enter__(self) -> "SqlClient":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Disposes the SQL alchemy engine and its connection pool."""
+        if self.conn is not None:
+            self.conn.dispose()
 
     def set_conn(self, db_url: str, **kwargs) -> Callable[[], "Connection"]:
         """Sets SQL alchemy connection via a connection factory.
 
+        The engine is created once per process and shared by the connection factory so that
+        pooled connections are reused across partitions. The factory is picklable as the engine
+        is not serialized. Any existing engine is disposed.
+
         Args:
             db_url (str): Database URL.
             **kwargs: Arguments used to be added to SQL alchemy engine connection.
@@ -69,11 +205,102 @@ class SqlClient(object):
             Callable[[], Connection]: SQLAlchemy connection factory.
         """
         try:
-            return lambda: sqlalchemy.create_engine(db_url, **kwargs).connect()
+            kwargs.setdefault("pool_pre_ping", True)
+            conn = _ConnectionFactory(db_url, **kwargs)
         except Exception as e:
             raise SqlClientError(
                 f"Failed to set connection. db_url: {db_url}, error: {e}"
             )
+        self.close()
+        self.invalidate_query_cache()
+        self._schema_cache.clear()
+        self._bounds_cache.clear()
+        self.conn = conn
+        return self.conn
+
+    def invalidate_query_cache(self) -> None:
+        """Clears the cached query strings of `return_queries` and their schemas, e.g. after the source data changes."""
+        self._queries_cache.clear()
+        self._partition_schema_cache.clear()
+
+    def _cached_schema(self, sql: str) -> Optional[Dict[str, DataType]]:
+        schema = self._schema_cache.get(sql)
+        if schema is None:
+            schema = self._partition_schema_cache.get(sql)
+        return schema
+
+    def set_schema(self, sql: str, schema: Dict[str, DataType]) -> None:
+        """Declares the schema of a SQL query so that schema inference is skipped.
+
+        Args:
+            sql (str): SQL query.
+            schema (Dict[str, DataType]): A mapping of all column names to datatypes.
+        """
+        self._schema_cache[sql] = dict(schema)
+
+    def describe_schema(
+        self, sql: str, infer_schema_length: int = 10
+    ) -> Dict[str, DataType]:
+        """Infers the schema of a SQL query once and caches it for subsequent calls.
+
+        Args:
+            sql (str): SQL query.
+            infer_schema_length (int, optional): The number of rows to scan when inferring the schema. Defaults to 10.
+
+        Raises:
+            SqlClientError: SQL client error.
+
+        Returns:
+            Dict[str, DataType]: A mapping of column names to datatypes.
+        """
+        if sql not in self._schema_cache:
+            try:
+                df_schema = daft.read_sql(
+                    sql=sql,
+                    conn=self.conn,
+                    infer_schema=True,
+                    infer_schema_length=infer_schema_length,
+                ).schema()
+            except Exception as e:
+                raise SqlClientError(str(e))
+            self._schema_cache[sql] = {
+                name: df_schema[name].dtype for name in df_schema.column_names()
+            }
+        return dict(self._schema_cache[sql])
+
+    def set_partition_bounds(
+        self, sql: str, partition_col: str, lower: Any, upper: Any
+    ) -> None:
+        """Declares the bounds of a numeric partition column so that `return_queries` skips daft's bound probe.
+
+        Partitions split the range evenly. The first and last partitions are open-ended,
+        and the first one also includes null values, so no records are missed if the bounds are stale.
+        The bounds are only used with the "min-max" strategy and an explicit number of partitions
+        of at least two. Otherwise daft determines the partitions.
+
+        Args:
+            sql (str): SQL query.
+            partition_col (str): Column to partition the data.
+            lower (Any): Lower bound of the partition column, either an integer or a float.
+            upper (Any): Upper bound of the partition column, either an integer or a float.
+
+        Raises:
+            SqlClientError: SQL client error.
+        """
+        for bound in (lower, upper):
+            if (
+                not isinstance(bound, numbers.Real)
+                or isinstance(bound, bool)
+                or not math.isfinite(bound)
+            ):
+                raise SqlClientError(
+                    f"Partition bounds should be finite numbers. lower: {lower!r}, upper: {upper!r}"
+                )
+        if lower > upper:
+            raise SqlClientError(
+                f"Lower bound should not be greater than upper bound. lower: {lower}, upper: {upper}"
+            )
+        self._bounds_cache[(sql, partition_col)] = (lower, upper)
 
     def return_queries(
         self,
@@ -88,6 +315,11 @@ class SqlClient(object):
     ) -> List[str]:
         """Returns one or more query strings from SQL query configurations.
 
+        Query strings of partitioned queries are cached by the query configurations
+        as partition bounds rarely change. Call `invalidate_query_cache` to refresh them.
+        If partition bounds are declared by `set_partition_bounds`, query strings of the "min-max"
+        strategy with at least two partitions are built from them directly without querying the database.
+
         Args:
             sql (str): SQL query to execute.
             partition_col (Optional[str], optional): Column to partition the data. Defaults to None.
@@ -96,7 +328,7 @@ class SqlClient(object):
             disable_pushdowns_to_sql (bool, optional): Whether to disable pushdowns to the SQL query. Defaults to False.
             infer_schema (bool, optional):  Whether to turn on schema inference. Defaults to True.
             infer_schema_length (int, optional): The number of rows to scan when inferring the schema. Defaults to 10.
-            schema (Optional[Dict[str, DataType]], optional): A mapping of column names to datatypes. Defaults to None.
+            schema (Optional[Dict[str, DataType]], optional): A mapping of column names to datatypes. Defaults to None, which uses the schema declared by `set_schema` or `describe_schema` if any.
 
         Raises:
             SqlClientError: SQL client error.
@@ -104,32 +336,73 @@ class SqlClient(object):
         Returns:
             List[str]: List of query strings.
         """
-        try:
-            if self.use_native_runner:
-                daft.context.set_runner_native()
-            df = daft.read_sql(
-                sql=sql,
-                conn=self.conn,
-                partition_col=partition_col,
-                num_partitions=num_partitions,
-                partition_bound_strategy=partition_bound_strategy,
-                disable_pushdowns_to_sql=disable_pushdowns_to_sql,
-                infer_schema=infer_schema,
-                infer_schema_length=infer_schema_length,
-                schema=schema,
+        if partition_col is None and num_partitions is not None:
+            raise SqlClientError(
+                "Partition column should be specified if the number of partitions is specified."
             )
-
-            physical_plan_scheduler = df._builder.to_physical_plan_scheduler(
-                daft.context.get_context().daft_execution_config
+        if partition_col is None or num_partitions == 1:
+            return [sql]
+        if schema is None and self._cached_schema(sql) is not None:
+            schema, infer_schema = self._cached_schema(sql), False
+        bounds = self._bounds_cache.get((sql, partition_col))
+        if (
+            bounds is not None
+            and partition_bound_strategy == "min-max"
+            and isinstance(num_partitions, numbers.Integral)
+            and num_partitions >= 2
+        ):
+            sql_queries = _bounded_queries(sql, partition_col, num_partitions, *bounds)
+        else:
+            key = (
+                sql,
+                partition_col,
+                num_partitions,
+                partition_bound_strategy,
+                disable_pushdowns_to_sql,
+                infer_schema,
+                infer_schema_length,
+                tuple(sorted((k, str(v)) for k, v in schema.items()))
+                if schema
+                else None,
             )
-            physical_plan_dict = json.loads(physical_plan_scheduler.to_json_string())
+            if key in self._queries_cache:
+                self._queries_cache.move_to_end(key)
+                return list(self._queries_cache[key])
+            try:
+                df = daft.read_sql(
+                    sql=sql,
+                    conn=self.conn,
+                    partition_col=partition_col,
+                    num_partitions=num_partitions,
+                    partition_bound_strategy=partition_bound_strategy,
+                    disable_pushdowns_to_sql=disable_pushdowns_to_sql,
+                    infer_schema=infer_schema,
+                    infer_schema_length=infer_schema_length,
+                    schema=schema,
+                )
 
-            sql_queries = []
-            for task in physical_plan_dict["TabularScan"]["scan_tasks"]:
-                sql_queries.append(task["file_format_config"]["Database"]["sql"])
-            return sql_queries
-        except Exception as e:
-            raise SqlClientError(str(e))
+                physical_plan_scheduler = df._builder.to_physical_plan_scheduler(
+                    daft.context.get_context().daft_execution_config
+                )
+                physical_plan_dict = _json_loads(
+                    physical_plan_scheduler.to_json_string()
+                )
+                sql_queries = [
+                    task["file_format_config"]["Database"]["sql"]
+                    for task in physical_plan_dict["TabularScan"]["scan_tasks"]
+                ]
+            except Exception as e:
+                raise SqlClientError(str(e))
+            self._queries_cache[key] = sql_queries
+            if len(self._queries_cache) > self.QUERIES_CACHE_SIZE:
+                self._queries_cache.popitem(last=False)
+        if schema and not infer_schema:
+            for query in sql_queries:
+                self._partition_schema_cache.pop(query, None)
+                self._partition_schema_cache[query] = schema
+            while len(self._partition_schema_cache) > self.PARTITION_SCHEMA_CACHE_SIZE:
+                self._partition_schema_cache.popitem(last=False)
+        return list(sql_queries)
 
     def return_df(
         self,
@@ -148,7 +421,7 @@ class SqlClient(object):
             disable_pushdowns_to_sql (bool, optional): Whether to disable pushdowns to the SQL query. Defaults to False.
             infer_schema (bool, optional):  Whether to turn on schema inference. Defaults to True.
             infer_schema_length (int, optional): The number of rows to scan when inferring the schema. Defaults to 10.
-            schema (Optional[Dict[str, DataType]], optional): A mapping of column names to datatypes. Defaults to None.
+            schema (Optional[Dict[str, DataType]], optional): A mapping of column names to datatypes. Defaults to None, which uses the schema declared by `set_schema` or `describe_schema` if any.
 
         Raises:
             SqlClientError: SQL client error.
@@ -156,9 +429,9 @@ class SqlClient(object):
         Returns:
             DataFrame: Dataframe containing the results of the query.
         """
+        if schema is None and self._cached_schema(sql) is not None:
+            schema, infer_schema = self._cached_schema(sql), False
         try:
-            if self.use_native_runner:
-                daft.context.set_runner_native()
             return daft.read_sql(
                 sql=sql,
                 conn=self.conn,
@@ -170,3 +443,165 @@ class SqlClient(object):
             )
         except Exception as e:
             raise SqlClientError(str(e))
+
+    def return_dfs(
+        self,
+        queries: List[str],
+        max_workers: Optional[int] = None,
+        partition_bound_strategy: str = "min-max",
+        disable_pushdowns_to_sql: bool = False,
+        infer_schema: bool = True,
+        infer_schema_length: int = 10,
+        schema: Optional[Dict[str, DataType]] = None,
+    ) -> List[DataFrame]:
+        """Creates materialized DataFrames from the results of multiple SQL queries concurrently.
+
+        Each query is read and collected in a thread pool and the threads share the engine's
+        connection pool, which bounds the actual database concurrency. It requires a thread-safe driver.
+        Note URLs that use `SingletonThreadPool`, e.g. in-memory SQLite (`sqlite://`), give each
+        thread its own connection and therefore its own empty database.
+
+        Args:
+            queries (List[str]): SQL queries to execute, typically returned by `return_queries`.
+            max_workers (Optional[int], optional): Maximum number of threads. Defaults to None, which uses the number of queries capped by the capacity (pool size and max overflow) of the connection pool.
+            partition_bound_strategy (str, optional): Strategy to determine partition bounds, either "min-max" or "percentile". Defaults to "min-max".
+            disable_pushdowns_to_sql (bool, optional): Whether to disable pushdowns to the SQL query. Defaults to False.
+            infer_schema (bool, optional):  Whether to turn on schema inference. Defaults to True.
+            infer_schema_length (int, optional): The number of rows to scan when inferring the schema. Defaults to 10.
+            schema (Optional[Dict[str, DataType]], optional): A mapping of column names to datatypes. Defaults to None, which uses the schema declared by `set_schema` or `describe_schema` if any.
+
+        Raises:
+            SqlClientError: SQL client error.
+
+        Returns:
+            List[DataFrame]: Collected dataframes containing the results of the queries, in the order of the queries.
+        """
+        if not queries:
+            return []
+        if max_workers is None:
+            max_workers = len(queries)
+            pool = self.conn.engine.pool
+            # pool_size <= 0 and max_overflow < 0 mean no limit in SQL alchemy
+            if (
+                isinstance(pool, sqlalchemy.pool.QueuePool)
+                and pool.size() > 0
+                and pool._max_overflow >= 0
+            ):
+                max_workers = min(max_workers, pool.size() + pool._max_overflow)
+        elif not isinstance(max_workers, numbers.Integral) or max_workers <= 0:
+            raise SqlClientError(
+                f"Maximum number of workers should be a positive integer. max_workers: {max_workers!r}"
+            )
+
+        def collect(sql: str) -> DataFrame:
+            df = self.return_df(
+                sql=sql,
+                partition_bound_strategy=partition_bound_strategy,
+                disable_pushdowns_to_sql=disable_pushdowns_to_sql,
+                infer_schema=infer_schema,
+                infer_schema_length=infer_schema_length,
+                schema=schema,
+            )
+            try:
+                return df.collect()
+            except Exception as e:
+                raise SqlClientError(str(e))
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(collect, queries))
+
+    def return_df_all(
+        self,
+        queries: List[str],
+        infer_schema: bool = True,
+        infer_schema_length: int = 10,
+        schema: Optional[Dict[str, DataType]] = None,
+    ) -> DataFrame:
+        """Creates a single DataFrame from the results of multiple SQL queries in one round trip.
+
+        The queries are combined with `UNION ALL`, so they should have the same columns,
+        e.g. partition queries returned by `return_queries`. Pushdowns to the SQL query are disabled.
+
+        Args:
+            queries (List[str]): SQL queries to execute.
+            infer_schema (bool, optional):  Whether to turn on schema inference. Defaults to True.
+            infer_schema_length (int, optional): The number of rows to scan when inferring the schema. Defaults to 10.
+            schema (Optional[Dict[str, DataType]], optional): A mapping of column names to datatypes. Defaults to None, which uses the schema declared for the first query if any.
+
+        Raises:
+            SqlClientError: SQL client error.
+
+        Returns:
+            DataFrame: Dataframe containing the results of all queries.
+        """
+        if not queries:
+            raise SqlClientError("At least one query should be provided.")
+        if schema is None and self._cached_schema(queries[0]) is not None:
+            schema, infer_schema = self._cached_schema(queries[0]), False
+        if len(queries) == 1:
+            sql = queries[0]
+        else:
+            sql = " UNION ALL ".join(
+                f"SELECT * FROM ({qry}) AS q{i}" for i, qry in enumerate(queries)
+            )
+        return self.return_df(
+            sql=sql,
+            disable_pushdowns_to_sql=len(queries) > 1,
+            infer_schema=infer_schema,
+            infer_schema_length=infer_schema_length,
+            schema=schema,
+        )
+
+    def stream_partitions(
+        self, sql: str, chunksize: int = 50_000
+    ) -> Iterator[DataFrame]:
+        """Streams the results of a SQL query as DataFrames of at most `chunksize` records.
+
+        Results are fetched with `stream_results` so that memory is bounded by the chunk size
+        on drivers that support server-side cursors (e.g. psycopg2 and pymysql). Other drivers
+        such as SQLite buffer the results on the client side.
+
+        All DataFrames share the same schema, which is the schema declared by `set_schema` or
+        `describe_schema` if any, or the schema inferred from the first chunk otherwise. Declare
+        the schema if a nullable column can be entirely null in the first chunk. Column names
+        should be unique, e.g. alias duplicate columns of a join.
+
+        Args:
+            sql (str): SQL query to execute.
+            chunksize (int, optional): Maximum number of records in each DataFrame. Defaults to 50_000.
+
+        Raises:
+            SqlClientError: SQL client error.
+
+        Yields:
+            Iterator[DataFrame]: Dataframes containing the results of the query.
+        """
+        try:
+            with self.conn() as conn:
+                result = conn.execution_options(stream_results=True).execute(
+                    sqlalchemy.text(sql)
+                )
+                columns = list(result.keys())
+                duplicates = sorted({col for col in columns if columns.count(col) > 1})
+                if duplicates:
+                    raise SqlClientError(
+                        f"Column names should be unique. duplicates: {duplicates}"
+                    )
+                schema = self._cached_schema(sql)
+                arrow_types = (
+                    [schema[col].to_arrow_dtype() for col in columns]
+                    if schema is not None
+                    else [None] * len(columns)
+                )
+                for rows in result.partitions(chunksize):
+                    table = pa.Table.from_arrays(
+                        [
+                            pa.array(list(vals), type=arrow_type)
+                            for vals, arrow_type in zip(zip(*rows), arrow_types)
+                        ],
+                        names=columns,
+                    )
+                    arrow_types = [field.type for field in table.schema]
+                    yield daft.from_arrow(table)
+        except Exception as e:
+            raise SqlClientError(str(e))
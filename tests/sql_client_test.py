@@ -16,39 +16,40 @@
 #
 
 import os
-import random
+import pickle
 import string
+import threading
 import uuid
-from datetime import date, timedelta
+from datetime import date
 import unittest
+from unittest import mock
 
+import daft
 import sqlalchemy
+import numpy as np
 import pandas as pd
+from daft.datatype import DataType
 from parameterized import parameterized
 
 from sql_pyio.sql_client import SqlClient, SqlClientError
 
 
 def generate_df(num_rec: int = 100):
-    random.seed(1237)
+    rng = np.random.default_rng(1237)
+    letters = np.array(list(string.ascii_lowercase))
+    start = np.datetime64(date(2024, 1, 1), "D")
     users = {
         "id": range(num_rec),
-        "name": [
-            "".join(random.choices(string.ascii_lowercase, k=5)) for _ in range(num_rec)
-        ],
-        "created_at": [
-            date(2024, 1, 1) + timedelta(days=random.randint(0, 100))
-            for _ in range(num_rec)
-        ],
+        "name": letters[rng.integers(0, 26, size=(num_rec, 5))].view("U5").ravel(),
+        "created_at": start
+        + rng.integers(0, 101, size=num_rec).astype("timedelta64[D]"),
     }
     orders = {
         "id": str(uuid.uuid4()),
-        "user_id": [random.randrange(0, num_rec) for _ in range(num_rec * 5)],
-        "num_items": [random.randrange(0, 10) for _ in range(num_rec * 5)],
-        "created_at": [
-            date(2024, 1, 1) + timedelta(days=random.randint(0, 100))
-            for _ in range(num_rec * 5)
-        ],
+        "user_id": rng.integers(0, num_rec, size=num_rec * 5),
+        "num_items": rng.integers(0, 10, size=num_rec * 5),
+        "created_at": start
+        + rng.integers(0, 101, size=num_rec * 5).astype("timedelta64[D]"),
     }
     return pd.DataFrame(users), pd.DataFrame(orders)
 
@@ -61,32 +62,254 @@ class TestSqlClient(unittest.TestCase):
     @classmethod
     def setUpClass(self):
         print(os.path.dirname(os.path.abspath(__file__)))
-        self.users.to_sql(
-            name="users",
-            con=sqlalchemy.create_engine(self.db_url).connect(),
-            if_exists="replace",
-        )
-        self.orders.to_sql(
-            name="orders",
-            con=sqlalchemy.create_engine(self.db_url).connect(),
-            if_exists="replace",
-        )
+        engine = sqlalchemy.create_engine(self.db_url)
+        with engine.begin() as conn:
+            for name, df in [("users", self.users), ("orders", self.orders)]:
+                df.to_sql(
+                    name=name,
+                    con=conn,
+                    if_exists="replace",
+                    index=False,
+                    method="multi",
+                    chunksize=200,
+                )
+        engine.dispose()
         self.client = SqlClient(db_url=self.db_url)
 
     @classmethod
     def tearDownClass(self):
+        self.client.close()
         os.remove(f"{self.current_path}/develop.db")
         os.remove(f"{self.current_path}/non-existing-db.db")
 
+    def test_runner_error(self):
+        with mock.patch("sql_pyio.sql_client._runner_set", False), mock.patch(
+            "sql_pyio.sql_client.daft.context.set_runner_native",
+            side_effect=RuntimeError("Cannot set runner more than once"),
+        ):
+            with self.assertRaises(SqlClientError) as cm:
+                SqlClient(db_url=self.db_url)
+        self.assertRegex(cm.exception.message, r"Cannot set runner")
+
+    def test_runner_is_set_after_unpickling(self):
+        pickled = pickle.dumps(self.client)
+        with mock.patch("sql_pyio.sql_client._runner_set", False), mock.patch(
+            "sql_pyio.sql_client.daft.context.set_runner_native"
+        ) as set_runner_native:
+            client = pickle.loads(pickled)
+        set_runner_native.assert_called_once()
+        self.assertTrue(client.use_native_runner)
+        client.close()
+
+    def test_pickle(self):
+        conn = pickle.loads(pickle.dumps(self.client.conn))
+        with conn() as c:
+            self.assertEqual(c.execute(sqlalchemy.text("SELECT 1")).scalar(), 1)
+        conn.dispose()
+
+        client = pickle.loads(pickle.dumps(self.client))
+        queries = client.return_queries(
+            sql="SELECT * FROM users", partition_col="id", num_partitions=4
+        )
+        self.assertEqual(len(queries), 4)
+        client.close()
+
     def test_sql_client_error(self):
         with self.assertRaises(SqlClientError) as cm:
-            client = SqlClient(
+            with SqlClient(
                 db_url=f"sqlite:///{self.current_path}/non-existing-db.db"
+            ) as client:
+                client.return_queries(
+                    sql="SELECT * FROM users", partition_col="id", num_partitions=4
+                )
+        self.assertRegex(cm.exception.message, r"no such table: users")
+
+    @parameterized.expand(
+        [
+            ("no_partition", None, None),
+            ("single_partition", "id", 1),
+        ]
+    )
+    def test_no_physical_plan_without_partitions(
+        self, name, partition_col, num_partitions
+    ):
+        with mock.patch("sql_pyio.sql_client.daft.read_sql") as read_sql:
+            queries = self.client.return_queries(
+                sql="SELECT * FROM users",
+                partition_col=partition_col,
+                num_partitions=num_partitions,
             )
-            client.return_queries(
+        read_sql.assert_not_called()
+        self.assertEqual(queries, ["SELECT * FROM users"])
+
+    def test_num_partitions_without_partition_col(self):
+        with self.assertRaises(SqlClientError) as cm:
+            self.client.return_queries(sql="SELECT * FROM users", num_partitions=4)
+        self.assertRegex(cm.exception.message, r"Partition column should be specified")
+
+    def test_query_cache(self):
+        kwargs = dict(sql="SELECT * FROM users", partition_col="id", num_partitions=4)
+        queries = self.client.return_queries(**kwargs)
+        with mock.patch(
+            "sql_pyio.sql_client.daft.read_sql", wraps=daft.read_sql
+        ) as read_sql:
+            self.assertEqual(self.client.return_queries(**kwargs), queries)
+            read_sql.assert_not_called()
+
+            self.client.invalidate_query_cache()
+            self.assertEqual(self.client.return_queries(**kwargs), queries)
+            read_sql.assert_called_once()
+
+    def test_cached_schema(self):
+        client = SqlClient(db_url=self.db_url)
+        schema = client.describe_schema("SELECT * FROM users")
+        self.assertEqual(list(schema.keys()), list(self.users.columns))
+
+        queries = client.return_queries(
+            sql="SELECT * FROM users", partition_col="id", num_partitions=4
+        )
+        with mock.patch("sql_pyio.sql_client.daft.read_sql") as read_sql:
+            client.return_df(sql=queries[0])
+        self.assertFalse(read_sql.call_args.kwargs["infer_schema"])
+        self.assertEqual(read_sql.call_args.kwargs["schema"], schema)
+        client.close()
+
+    def test_number_of_queries_and_records_with_partition_bounds(self):
+        client = SqlClient(db_url=self.db_url)
+        client.set_partition_bounds("SELECT * FROM users", "id", 0, 999)
+        with mock.patch("sql_pyio.sql_client.daft.read_sql") as read_sql:
+            queries = client.return_queries(
                 sql="SELECT * FROM users", partition_col="id", num_partitions=4
             )
-        self.assertRegex(cm.exception.message, r"no such table: users")
+        read_sql.assert_not_called()
+        self.assertEqual(len(queries), 4)
+
+        num_rec = 0
+        for qry in queries:
+            df = client.return_df(sql=qry)
+            num_rec += df.count_rows()
+        self.assertEqual(num_rec, len(self.users.index))
+        client.close()
+
+    @parameterized.expand(
+        [
+            ("single_query", 1),
+            ("multiple_queries", 4),
+        ]
+    )
+    def test_number_of_records_with_union_all(self, name, num_partitions):
+        queries = self.client.return_queries(
+            sql="SELECT * FROM users",
+            partition_col="id",
+            num_partitions=num_partitions,
+        )
+        df = self.client.return_df_all(queries)
+        self.assertEqual(df.count_rows(), len(self.users.index))
+
+    def test_number_of_records_with_streaming(self):
+        dfs = list(
+            self.client.stream_partitions(sql="SELECT * FROM users", chunksize=300)
+        )
+        self.assertEqual(len(dfs), 4)
+        self.assertEqual(sum(df.count_rows() for df in dfs), len(self.users.index))
+
+    def test_number_of_records_with_streaming_join(self):
+        dfs = list(
+            self.client.stream_partitions(
+                sql="SELECT ROW_NUMBER() OVER() AS rn, o.id AS order_id, u.id AS user_id, u.name FROM orders AS o JOIN users AS u ON o.user_id = u.id",
+                chunksize=2000,
+            )
+        )
+        self.assertEqual(len(dfs), 3)
+        self.assertEqual(dfs[0].column_names, ["rn", "order_id", "user_id", "name"])
+        self.assertEqual(sum(df.count_rows() for df in dfs), 5000)
+
+    def test_streaming_join_with_duplicate_columns(self):
+        with self.assertRaises(SqlClientError) as cm:
+            list(
+                self.client.stream_partitions(
+                    sql="SELECT ROW_NUMBER() OVER() AS rn, * FROM orders AS o JOIN users AS u ON o.user_id = u.id"
+                )
+            )
+        self.assertRegex(cm.exception.message, r"duplicates: \['created_at', 'id'\]")
+
+    def test_schema_of_streaming_with_declared_schema(self):
+        sql = "SELECT id, CASE WHEN id >= 300 THEN name END AS name FROM users ORDER BY id"
+        client = SqlClient(db_url=self.db_url)
+        client.set_schema(sql, {"id": DataType.int64(), "name": DataType.string()})
+        dfs = list(client.stream_partitions(sql=sql, chunksize=300))
+        self.assertEqual(len(dfs), 4)
+        self.assertTrue(all(df.schema() == dfs[0].schema() for df in dfs))
+
+        df = dfs[0]
+        for other in dfs[1:]:
+            df = df.concat(other)
+        self.assertEqual(df.count_rows(), len(self.users.index))
+        client.close()
+
+    def test_cached_schema_is_replaced(self):
+        sql = "SELECT id, name FROM users"
+        client = SqlClient(db_url=self.db_url)
+        for schema in [
+            {"id": DataType.int64(), "name": DataType.string()},
+            {"id": DataType.float64(), "name": DataType.string()},
+        ]:
+            client.set_schema(sql, schema)
+            queries = client.return_queries(
+                sql=sql, partition_col="id", num_partitions=4
+            )
+            with mock.patch("sql_pyio.sql_client.daft.read_sql") as read_sql:
+                client.return_df(sql=queries[0])
+            self.assertEqual(read_sql.call_args.kwargs["schema"], schema)
+
+        client.invalidate_query_cache()
+        with mock.patch("sql_pyio.sql_client.daft.read_sql") as read_sql:
+            client.return_df(sql=queries[0])
+        self.assertTrue(read_sql.call_args.kwargs["infer_schema"])
+        client.close()
+
+    @parameterized.expand(
+        [
+            ("no_num_partitions", None, "min-max"),
+            ("zero_partitions", 0, "min-max"),
+            ("percentile", 4, "percentile"),
+        ]
+    )
+    def test_partition_bounds_fall_back_to_daft(
+        self, name, num_partitions, partition_bound_strategy
+    ):
+        client = SqlClient(db_url=self.db_url)
+        client.set_partition_bounds("SELECT * FROM users", "id", 0, 999)
+        with mock.patch(
+            "sql_pyio.sql_client.daft.read_sql", wraps=daft.read_sql
+        ) as read_sql:
+            try:
+                client.return_queries(
+                    sql="SELECT * FROM users",
+                    partition_col="id",
+                    num_partitions=num_partitions,
+                    partition_bound_strategy=partition_bound_strategy,
+                )
+            except SqlClientError:
+                pass
+        read_sql.assert_called_once()
+        client.close()
+
+    @parameterized.expand(
+        [
+            ("date", date(2024, 1, 1), date(2024, 4, 10)),
+            ("string", "a", "z"),
+            ("bool", False, True),
+            ("nan", 0, float("nan")),
+            ("inf", 0, float("inf")),
+        ]
+    )
+    def test_non_numeric_partition_bounds(self, name, lower, upper):
+        with self.assertRaises(SqlClientError) as cm:
+            self.client.set_partition_bounds(
+                "SELECT * FROM users", "created_at", lower, upper
+            )
+        self.assertRegex(cm.exception.message, r"Partition bounds should be finite numbers")
 
     @parameterized.expand(
         [
@@ -112,7 +335,7 @@ class TestSqlClient(unittest.TestCase):
         num_rec = 0
         for qry in queries:
             df = self.client.return_df(sql=qry)
-            num_rec += len(df.to_pylist())
+            num_rec += df.count_rows()
         self.assertEqual(num_rec, len(self.users.index))
 
     def test_number_of_queries_and_records_with_limit(self):
@@ -126,7 +349,7 @@ class TestSqlClient(unittest.TestCase):
         num_rec = 0
         for qry in queries:
             df = self.client.return_df(sql=qry)
-            num_rec += len(df.to_pylist())
+            num_rec += df.count_rows()
         self.assertEqual(num_rec, 700)
 
     def test_number_of_queries_and_records_with_synthetic_col(self):
@@ -140,7 +363,7 @@ class TestSqlClient(unittest.TestCase):
         num_rec = 0
         for qry in queries:
             df = self.client.return_df(sql=qry)
-            num_rec += len(df.to_pylist())
+            num_rec += df.count_rows()
         self.assertEqual(num_rec, 1000)
 
     def test_number_of_queries_and_records_with_join(self):
@@ -154,5 +377,45 @@ class TestSqlClient(unittest.TestCase):
         num_rec = 0
         for qry in queries:
             df = self.client.return_df(sql=qry)
-            num_rec += len(df.to_pylist())
+            num_rec += df.count_rows()
         self.assertEqual(num_rec, 5000)
+
+    @parameterized.expand([("zero", 0), ("negative", -1)])
+    def test_invalid_max_workers(self, name, max_workers):
+        with self.assertRaises(SqlClientError) as cm:
+            self.client.return_dfs(["SELECT * FROM users"], max_workers=max_workers)
+        self.assertRegex(cm.exception.message, r"should be a positive integer")
+
+    def test_concurrent_dfs_with_unlimited_pool(self):
+        client = SqlClient(db_url=self.db_url, pool_size=0)
+        dfs = client.return_dfs(["SELECT * FROM users", "SELECT * FROM orders"])
+        self.assertEqual(
+            [df.count_rows() for df in dfs],
+            [len(self.users.index), len(self.orders.index)],
+        )
+        client.close()
+
+    def test_number_of_records_with_concurrent_dfs(self):
+        queries = self.client.return_queries(
+            sql="SELECT * FROM users",
+            partition_col="id",
+            num_partitions=4,
+        )
+        # every read waits for another one, which fails unless reads run concurrently
+        barrier = threading.Barrier(2, timeout=10)
+        return_df = SqlClient.return_df
+
+        def wait_and_return_df(client, **kwargs):
+            barrier.wait()
+            return return_df(client, **kwargs)
+
+        with mock.patch.object(
+            SqlClient, "return_df", autospec=True, side_effect=wait_and_return_df
+        ):
+            dfs = self.client.return_dfs(queries, max_workers=2)
+        self.assertEqual(len(dfs), 4)
+
+        num_rec = 0
+        for df in dfs:
+            num_rec += df.count_rows()
+        self.assertEqual(num_rec, len(self.users.index))